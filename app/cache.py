@@ -0,0 +1,117 @@
+import functools
+import logging
+from typing import Any, Callable, Dict
+
+import orjson
+from cachetools import TTLCache
+from fastapi.encoders import jsonable_encoder
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Limites do cache das respostas de leitura
+CACHE_MAXSIZE = 1024
+CACHE_TTL = 30
+
+# Com REDIS_URL configurado o cache é compartilhado entre os processos da API;
+# sem ele, cada processo mantém o seu próprio cache em memória, e uma escrita
+# só invalida o cache do processo que a atendeu. Com mais de um worker
+# (uvicorn --workers, gunicorn) configure REDIS_URL, ou os demais processos
+# podem servir respostas desatualizadas por até CACHE_TTL segundos
+redis = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+
+# Cada coleção tem uma geração, incrementada a cada escrita, e as gerações
+# das coleções lidas pela rota fazem parte da chave. Uma escrita torna as
+# respostas antigas inalcançáveis, e elas saem do cache pelo TTL ou pelo LRU.
+# No Redis as gerações ficam em contadores compartilhados entre os processos
+_geracoes: Dict[str, int] = {}
+_cache: TTLCache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+_AUSENTE = object()
+
+
+def _chave_geracao(colecao: str) -> str:
+    """Chave do contador Redis com a geração atual da coleção."""
+    return f"cache:geracao:{colecao}"
+
+
+def em_cache(*colecoes: str) -> Callable:
+    """
+    Guarda o resultado de uma rota de leitura, chaveado pelos parâmetros.
+
+    Args:
+        colecoes (str): Coleções lidas pela rota; uma escrita em qualquer
+            uma delas invalida as respostas guardadas.
+    """
+    dependencias = tuple(sorted(set(colecoes)))
+
+    def decorator(func: Callable) -> Callable:
+        prefixo = f"cache:{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs: Any) -> Any:
+            # As gerações são lidas antes da consulta: se uma escrita
+            # acontecer enquanto ela roda, o resultado é guardado sob uma
+            # chave já vencida e não sobrevive à invalidação
+            if redis is None:
+                geracoes = [_geracoes.get(colecao, 0) for colecao in dependencias]
+            else:
+                try:
+                    lidas = await redis.mget(
+                        [_chave_geracao(colecao) for colecao in dependencias]
+                    )
+                except RedisError:
+                    logger.warning("Redis indisponível, lendo sem cache")
+                    return await func(**kwargs)
+                geracoes = [int(geracao or 0) for geracao in lidas]
+
+            chave = f"{prefixo}:{geracoes!r}:{sorted(kwargs.items())!r}"
+
+            if redis is None:
+                guardado = _cache.get(chave, _AUSENTE)
+                if guardado is not _AUSENTE:
+                    return guardado
+            else:
+                try:
+                    guardado = await redis.get(chave)
+                except RedisError:
+                    logger.warning("Redis indisponível, lendo sem cache")
+                    guardado = None
+                if guardado is not None:
+                    return orjson.loads(guardado)
+
+            resultado = await func(**kwargs)
+
+            if redis is None:
+                _cache[chave] = resultado
+            else:
+                valor = orjson.dumps(jsonable_encoder(resultado))
+                try:
+                    await redis.set(chave, valor, ex=CACHE_TTL)
+                except RedisError:
+                    logger.warning("Redis indisponível, resposta não guardada")
+
+            return resultado
+
+        return wrapper
+
+    return decorator
+
+
+async def invalidar(*colecoes: str) -> None:
+    """Descarta as respostas em cache que dependem das coleções informadas."""
+    if redis is not None:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for colecao in colecoes:
+                    pipe.incr(_chave_geracao(colecao))
+                await pipe.execute()
+        except RedisError:
+            # A escrita já foi feita; as respostas antigas expiram pelo TTL
+            logger.warning("Redis indisponível, cache não invalidado")
+        return
+
+    for colecao in colecoes:
+        _geracoes[colecao] = _geracoes.get(colecao, 0) + 1
@@ -1,17 +1,32 @@
 # config.py
 from dotenv import load_dotenv
+from typing import Final, Optional
 import os
 
 load_dotenv()
 
 # Carregar a URL do MongoDB do .env
-MONGO_URL = os.getenv("MONGO_URL")
+_mongo_url = os.environ.get("MONGO_URL")
 
-if not MONGO_URL:
+if not _mongo_url:
     raise ValueError(
         "MONGO_URL não encontrado no ambiente. Configure corretamente no .env"
     )
 
+MONGO_URL: Final[str] = _mongo_url
+DB_NAME: Final[str] = os.environ.get("MONGO_DB_NAME", "banco-memorias")
+
+# Pool de conexões do cliente MongoDB, ajustável por ambiente
+MAX_POOL_SIZE: Final[int] = int(os.environ.get("MONGO_MAX_POOL_SIZE", "200"))
+MIN_POOL_SIZE: Final[int] = int(os.environ.get("MONGO_MIN_POOL_SIZE", "20"))
+
+# Compressão do protocolo, em ordem de preferência; o servidor escolhe o
+# primeiro que também suportar e, sem nenhum em comum, nada é comprimido
+COMPRESSORS: Final[str] = os.environ.get("MONGO_COMPRESSORS", "zstd,zlib")
+
+# Redis opcional para compartilhar o cache de respostas entre processos
+REDIS_URL: Final[Optional[str]] = os.environ.get("REDIS_URL")
+
 
 def get_mongo_url() -> str:
     """Retorna a URL de conexão do MongoDB a partir de variáveis de ambiente.
@@ -1,22 +1,53 @@
 # database.py
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
-from app.config import MONGO_URL
+from app.config import (
+    MONGO_URL,
+    DB_NAME,
+    MAX_POOL_SIZE,
+    MIN_POOL_SIZE,
+    COMPRESSORS,
+)
 from app.models.categoria import Categoria
 from app.models.pessoa import Pessoa
 from app.models.memoria import Memoria
 from app.models.grupo import Grupo
-import os
 
-DB_NAME = os.getenv("MONGO_DB_NAME", "banco-memorias")
-
-# Criar cliente do MongoDB
-client = AsyncIOMotorClient(MONGO_URL)
+# Cliente único do MongoDB, compartilhado por toda a aplicação. As conexões
+# ociosas do pool são reaproveitadas entre requisições; quando o pool está
+# esgotado a requisição espera no máximo waitQueueTimeoutMS por uma conexão.
+# Conexões ociosas há mais de maxIdleTimeMS são renovadas, sem deixar o pool
+# abaixo de minPoolSize
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    maxPoolSize=MAX_POOL_SIZE,
+    minPoolSize=MIN_POOL_SIZE,
+    maxIdleTimeMS=60000,
+    waitQueueTimeoutMS=2000,
+    connectTimeoutMS=2000,
+    serverSelectionTimeoutMS=3000,
+    retryWrites=True,
+    compressors=COMPRESSORS,
+)
 db = client[DB_NAME]
 
 
+_beanie_iniciado = False
+
+
+def get_database():
+    """Retorna o banco de dados compartilhado pela aplicação."""
+    return db
+
+
 async def init_db():
+    """Inicializa o Beanie uma única vez por processo."""
+    global _beanie_iniciado
+    if _beanie_iniciado:
+        return
+
     await init_beanie(
         database=db,
         document_models=[Categoria, Pessoa, Memoria, Grupo],  # Inclua Grupo
     )
+    _beanie_iniciado = True
@@ -1,9 +1,15 @@
 # main.py
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.database import init_db
+from fastapi.responses import ORJSONResponse
+from app.database import MIN_POOL_SIZE, db, init_db
 from app.routers import categoria, pessoa, memoria, grupo
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -11,18 +17,21 @@ async def lifespan(app: FastAPI):
 
     Actions:
         - Inicializa conexão com banco de dados na startup
+        - Aquece o pool de conexões antes de atender requisições
         - Garante desconexão limpa no shutdown
     """
     await init_db()
-    print("Conexão com o MongoDB verificada com sucesso!")
+    await asyncio.gather(*(db.command("ping") for _ in range(MIN_POOL_SIZE)))
+    logger.info("Conexão com o MongoDB verificada com sucesso!")
 
     yield
 
-    print("Encerrando a aplicação...")
+    logger.info("Encerrando a aplicação...")
 
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     title="API de Memorias Pessoais",
     description="API para gerenciamento de memórias emocionais",
 )
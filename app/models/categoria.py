@@ -1,6 +1,12 @@
 # categoria.py
 from beanie import Document, Indexed
-from pydantic import Field
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
+from pymongo.collation import Collation
+from typing import Optional, Union
+
+# Comparação sem diferenciar maiúsculas/minúsculas para o nome da categoria
+NOME_COLLATION = Collation(locale="en", strength=2)
 
 
 class Categoria(Document):
@@ -9,7 +15,7 @@ class Categoria(Document):
 
     Attributes:
         categoria_id (Indexed(int)): Identificador único numérico da categoria
-        nome (str): Nome descritivo da categoria
+        nome (str): Nome descritivo da categoria (único, case insensitive)
 
     Raises:
         ValueError: Se categoria_id não for único na coleção
@@ -22,3 +28,40 @@ class Categoria(Document):
         """Configurações do banco de dados para a coleção de categorias"""
 
         collection = "categorias"
+        indexes = [
+            IndexModel([("nome", ASCENDING)], unique=True, collation=NOME_COLLATION),
+        ]
+
+    @classmethod
+    async def buscar_por_identificador(
+        cls, identificador: Union[int, str]
+    ) -> Optional["Categoria"]:
+        """
+        Busca uma categoria por ID numérico ou pelo nome (case insensitive).
+
+        Args:
+            identificador (Union[int, str]): categoria_id ou nome da categoria
+
+        Returns:
+            Optional[Categoria]: Categoria encontrada ou None
+        """
+        if isinstance(identificador, int) or identificador.isdigit():
+            return await cls.find_one(cls.categoria_id == int(identificador))
+
+        return await cls.find_one(cls.nome == identificador, collation=NOME_COLLATION)
+
+
+class CategoriaEntrada(BaseModel):
+    """
+    Corpo das requisições de criação e atualização de categoria.
+
+    O tamanho do nome é validado só na entrada: categorias já gravadas, e as
+    embutidas nas memórias, continuam legíveis mesmo fora desse limite.
+
+    Attributes:
+        categoria_id (int): Identificador único numérico da categoria
+        nome (str): Nome descritivo da categoria, entre 3 e 50 caracteres
+    """
+
+    categoria_id: int
+    nome: str = Field(..., min_length=3, max_length=50, description="Nome da categoria")
@@ -1,6 +1,7 @@
 # models/grupo.py
-from beanie import Document, Indexed
+from beanie import Document, Indexed, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
 from typing import List
 
 
@@ -29,6 +30,7 @@ class Grupo(Document):
 
     Configurações:
         collection (str): Nome da coleção no banco de dados.
+        indexes (list): Índice em pessoas.id para buscar os grupos de uma pessoa.
     """
 
     nome: Indexed(str, unique=True) = Field(..., description="Nome do grupo")
@@ -36,3 +38,17 @@ class Grupo(Document):
 
     class Settings:
         collection = "grupos"
+        indexes = [IndexModel([("pessoas.id", ASCENDING)])]
+
+
+class GrupoResumo(BaseModel):
+    """
+    Projeção com apenas o identificador e o nome de um grupo.
+
+    Attributes:
+        id (PydanticObjectId): Identificador do grupo.
+        nome (str): Nome do grupo.
+    """
+
+    id: PydanticObjectId = Field(alias="_id")
+    nome: str
@@ -1,6 +1,8 @@
 # memoria.py
-from beanie import Document, Indexed
+from beanie import Document, PydanticObjectId
 from datetime import date
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
 from typing import Optional
 from .categoria import Categoria
 from .pessoa import Pessoa
@@ -11,7 +13,7 @@ class Memoria(Document):
     Representa uma memória associada a experiências pessoais.
 
     Attributes:
-        titulo (Indexed(str)): Título da memória com índice de texto para buscas
+        titulo (str): Título da memória com índice de texto para buscas
         descricao (str): Descrição detalhada do acontecimento
         data (date): Data em que a memória foi registrada
         emocao (str): Estado emocional associado (ex: Feliz, Triste)
@@ -19,7 +21,7 @@ class Memoria(Document):
         pessoa (Optional[Pessoa]): Pessoa associada à memória
     """
 
-    titulo: Indexed(str, index_type="text")
+    titulo: str
     descricao: str
     data: date
     emocao: str
@@ -30,3 +32,72 @@ class Memoria(Document):
         """Configurações do banco de dados para a coleção de memórias"""
 
         collection = "memorias"
+        indexes = [
+            IndexModel([("titulo", TEXT)]),
+            # Categoria e pessoa são embutidas: as buscas filtram pelo
+            # categoria_id da categoria e pelo _id da pessoa
+            IndexModel([("categoria.categoria_id", ASCENDING), ("data", DESCENDING)]),
+            IndexModel([("pessoa._id", ASCENDING), ("data", DESCENDING)]),
+        ]
+
+
+class MemoriaResumo(BaseModel):
+    """
+    Projeção enxuta de uma memória usada nas listagens.
+
+    Attributes:
+        id (PydanticObjectId): Identificador da memória
+        titulo (str): Título da memória
+        data (date): Data em que a memória foi registrada
+        emocao (str): Estado emocional associado
+    """
+
+    id: PydanticObjectId = Field(alias="_id")
+    titulo: str
+    data: date
+    emocao: str
+
+
+class ReferenciaPessoa(BaseModel):
+    """
+    Identificador da pessoa embutida em uma memória.
+
+    Attributes:
+        id (PydanticObjectId): Identificador da pessoa
+    """
+
+    id: PydanticObjectId = Field(alias="_id")
+
+
+class MemoriaDescricao(BaseModel):
+    """
+    Projeção com título e descrição de uma memória e a pessoa associada.
+
+    Attributes:
+        pessoa (ReferenciaPessoa): Pessoa associada à memória
+        titulo (str): Título da memória
+        descricao (str): Descrição detalhada do acontecimento
+    """
+
+    pessoa: ReferenciaPessoa
+    titulo: str
+    descricao: str
+
+    class Settings:
+        projection = {"pessoa._id": 1, "titulo": 1, "descricao": 1}
+
+
+class MemoriaTitulo(BaseModel):
+    """
+    Projeção com apenas o título de uma memória e a pessoa associada.
+
+    Attributes:
+        pessoa (ReferenciaPessoa): Pessoa associada à memória
+        titulo (str): Título da memória
+    """
+
+    pessoa: ReferenciaPessoa
+    titulo: str
+
+    class Settings:
+        projection = {"pessoa._id": 1, "titulo": 1}
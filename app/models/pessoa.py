@@ -1,7 +1,9 @@
 # pessoa.py
 from beanie import Document, Indexed
 from datetime import date
+from pymongo import ASCENDING, IndexModel
 from typing import List, Optional
+from .categoria import NOME_COLLATION
 
 
 class Pessoa(Document):
@@ -9,7 +11,8 @@ class Pessoa(Document):
     Representa uma pessoa associada às memórias registradas.
 
     Attributes:
-        nome (Indexed(str)): Nome completo com índice único
+        nome (Indexed(str)): Nome completo com índice único e índice
+            case insensitive para buscas por nome
         data_nascimento (date): Data de nascimento no formato AAAA-MM-DD
         memorias (Optional[List[str]]): Lista de títulos de memórias associadas
     """
@@ -22,3 +25,14 @@ class Pessoa(Document):
         """Configurações do banco de dados para a coleção de pessoas"""
 
         collection = "pessoas"
+        indexes = [
+            # Chave composta para não substituir o índice único de `nome`, que o
+            # Beanie mescla com os de Settings quando os campos são os mesmos
+            IndexModel(
+                [("nome", ASCENDING), ("_id", ASCENDING)],
+                name="nome_ci_id",
+                collation=NOME_COLLATION,
+            ),
+            # Atende a ordenação por data de nascimento nas duas direções
+            IndexModel([("data_nascimento", ASCENDING), ("_id", ASCENDING)]),
+        ]
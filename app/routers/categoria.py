@@ -1,13 +1,18 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Union
-from app.models.categoria import Categoria
+from beanie import PydanticObjectId, UpdateResponse
+from beanie.operators import Set
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from typing import List, Optional, Union
+from app.cache import em_cache, invalidar
+from app.models.categoria import Categoria, CategoriaEntrada
 from app.models.memoria import Memoria
 
 router = APIRouter()
 
 
 @router.post("/", response_model=Categoria)
-async def criar_categoria(categoria: Categoria):
+async def criar_categoria(entrada: CategoriaEntrada):
     """
     Cria nova categoria com validações.
 
@@ -15,38 +20,42 @@ async def criar_categoria(categoria: Categoria):
     - ID único numérico
     - Nome único (case insensitive)
     - Nome com mínimo 3 caracteres e máximo de 50 caracteres
-    """
-    if await Categoria.find_one(Categoria.categoria_id == categoria.categoria_id):
-        raise HTTPException(
-            status_code=400, detail="Já existe uma categoria com este ID"
-        )
 
-    if await Categoria.find_one(
-        {"nome": {"$regex": f"^{categoria.nome}$", "$options": "i"}}
-    ):
-        raise HTTPException(
-            status_code=400, detail="Já existe uma categoria com este nome"
-        )
-
-    if len(categoria.nome) < 3 or len(categoria.nome) > 50:
-        raise HTTPException(
-            status_code=422,
-            detail="O nome da categoria deve ter entre 3 e 50 caracteres",
-        )
-
-    await categoria.insert()
+    O tamanho do nome é validado pelo corpo da requisição e a unicidade é
+    garantida pelos índices únicos da coleção.
+    """
+    categoria = Categoria(**entrada.model_dump())
+    try:
+        await categoria.insert()
+    except DuplicateKeyError as e:
+        if "categoria_id" in (e.details or {}).get("keyPattern", {}):
+            detail = "Já existe uma categoria com este ID"
+        else:
+            detail = "Já existe uma categoria com este nome"
+        raise HTTPException(status_code=400, detail=detail)
+
+    await invalidar("categorias")
     return categoria
 
 
 @router.get("/", response_model=List[Categoria])
+@em_cache("categorias")
 async def listar_categorias(
     limit: int = Query(10, description="Número máximo de categorias a retornar"),
     skip: int = Query(0, description="Número de registros a pular"),
+    after: Optional[PydanticObjectId] = Query(
+        None, description="ID da última categoria da página anterior"
+    ),
 ):
     """
-    Lista categorias com paginação básica.
+    Lista categorias com paginação, ordenadas pelo ID.
+
+    Paginação:
+    - Por cursor: envie em `after` o ID da última categoria recebida
+    - Por deslocamento: limit/skip, mantido por compatibilidade
     """
-    query = Categoria.find()
+    filtro = {"_id": {"$gt": after}} if after else {}
+    query = Categoria.find(filtro).sort([("_id", ASCENDING)])
     categorias = await query.skip(skip).limit(limit).to_list()
 
     if not categorias:
@@ -56,6 +65,7 @@ async def listar_categorias(
 
 
 @router.get("/{identificador}", response_model=Categoria)
+@em_cache("categorias")
 async def obter_categoria(identificador: Union[int, str]):
     """
     Obtém categoria por ID numérico ou nome exato.
@@ -64,14 +74,7 @@ async def obter_categoria(identificador: Union[int, str]):
     - Busca flexível por diferentes identificadores
     - Validação case insensitive para nomes
     """
-    if isinstance(identificador, int) or identificador.isdigit():
-        categoria = await Categoria.find_one(
-            Categoria.categoria_id == int(identificador)
-        )
-    else:
-        categoria = await Categoria.find_one(
-            {"nome": {"$regex": f"^{identificador}$", "$options": "i"}}
-        )
+    categoria = await Categoria.buscar_por_identificador(identificador)
 
     if not categoria:
         raise HTTPException(status_code=404, detail="Categoria não encontrada")
@@ -80,29 +83,33 @@ async def obter_categoria(identificador: Union[int, str]):
 
 
 @router.put("/{categoria_id}", response_model=Categoria)
-async def atualizar_categoria(categoria_id: int, categoria: Categoria):
+async def atualizar_categoria(categoria_id: int, categoria: CategoriaEntrada):
     """
     Atualiza nome de categoria existente.
 
     Restrições:
     - Não permite alteração do categoria_id
     - Mantém mesma validação de nome da criação
+
+    A busca e a alteração são feitas em uma única operação atômica.
     """
-    if categoria.nome and len(categoria.nome) < 3:
+    try:
+        categoria_atualizada = await Categoria.find_one(
+            Categoria.categoria_id == categoria_id
+        ).update(
+            Set({Categoria.nome: categoria.nome}),
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+    except DuplicateKeyError:
         raise HTTPException(
-            status_code=422,
-            detail="O nome da categoria deve ter pelo menos 3 caracteres",
+            status_code=400, detail="Já existe uma categoria com este nome"
         )
 
-    existing_categoria = await Categoria.find_one(
-        Categoria.categoria_id == categoria_id
-    )
-    if not existing_categoria:
+    if not categoria_atualizada:
         raise HTTPException(status_code=404, detail="Categoria não encontrada")
 
-    existing_categoria.nome = categoria.nome
-    await existing_categoria.save()
-    return existing_categoria
+    await invalidar("categorias")
+    return categoria_atualizada
 
 
 @router.delete("/{categoria_id}")
@@ -112,15 +119,19 @@ async def excluir_categoria(categoria_id: int):
 
     Validações:
     - Remove memórias vinculadas automaticamente
+
+    A categoria é excluída primeiro; as memórias, filtradas pelo categoria_id
+    embutido, só são removidas quando a categoria existia.
     """
-    categoria = await Categoria.find_one(Categoria.categoria_id == categoria_id)
-    if not categoria:
+    resultado = await Categoria.find_one(
+        Categoria.categoria_id == categoria_id
+    ).delete()
+    if not resultado or not resultado.deleted_count:
         raise HTTPException(status_code=404, detail="Categoria não encontrada")
 
-    # Exclui todas as memórias associadas
-    await Memoria.find(Memoria.categoria == categoria).delete()
+    await Memoria.find({"categoria.categoria_id": categoria_id}).delete()
+    await invalidar("categorias", "memorias")
 
-    await categoria.delete()
     return {
         "message": "Categoria e suas memórias associadas foram excluídas com sucesso"
     }
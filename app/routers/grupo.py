@@ -1,13 +1,35 @@
+import asyncio
+from collections import defaultdict
 from fastapi import APIRouter, HTTPException
 from beanie import PydanticObjectId
-from typing import List, Union
-from app.models.grupo import Grupo, PessoaRef
+from beanie.operators import Pull, Push
+from typing import List, Optional, Union
+from app.cache import em_cache, invalidar
+from app.models.grupo import Grupo, GrupoResumo, PessoaRef
 from app.models.pessoa import Pessoa
-from app.models.memoria import Memoria
+from app.models.memoria import Memoria, MemoriaDescricao, MemoriaTitulo
 
 router = APIRouter(prefix="/grupos", tags=["Grupos"])
 
 
+async def _buscar_grupo(
+    identificador: Union[PydanticObjectId, str],
+) -> Optional[Grupo]:
+    """Busca um grupo pelo ID ou pelo nome."""
+    if isinstance(identificador, PydanticObjectId):
+        return await Grupo.get(identificador)
+    return await Grupo.find_one({"nome": identificador})
+
+
+async def _buscar_pessoa(
+    identificador: Union[PydanticObjectId, str],
+) -> Optional[Pessoa]:
+    """Busca uma pessoa pelo ID ou pelo nome."""
+    if isinstance(identificador, PydanticObjectId):
+        return await Pessoa.get(identificador)
+    return await Pessoa.find_one({"nome": identificador})
+
+
 @router.post("/")
 async def criar_grupo(nome: str):
     """
@@ -21,10 +43,12 @@ async def criar_grupo(nome: str):
     """
     grupo = Grupo(nome=nome)
     await grupo.create()
+    await invalidar("grupos")
     return {"mensagem": f"Grupo '{nome}' criado!", "id": str(grupo.id)}
 
 
 @router.get("/{grupo_identificador}", response_model=Grupo)
+@em_cache("grupos")
 async def obter_grupo(grupo_identificador: Union[PydanticObjectId, str]):
     """
     Obtém um grupo pelo ID ou pelo nome.
@@ -35,11 +59,7 @@ async def obter_grupo(grupo_identificador: Union[PydanticObjectId, str]):
     Returns:
         Grupo: Informações detalhadas do grupo.
     """
-    grupo = (
-        await Grupo.get(grupo_identificador)
-        if isinstance(grupo_identificador, PydanticObjectId)
-        else await Grupo.find_one({"nome": grupo_identificador})
-    )
+    grupo = await _buscar_grupo(grupo_identificador)
 
     if not grupo:
         raise HTTPException(status_code=404, detail="Grupo não encontrado")
@@ -48,6 +68,7 @@ async def obter_grupo(grupo_identificador: Union[PydanticObjectId, str]):
 
 
 @router.get("/", response_model=List[Grupo])
+@em_cache("grupos", "pessoas", "memorias")
 async def listar_grupos():
     """
     Lista todos os grupos cadastrados, incluindo as pessoas e suas memórias associadas.
@@ -57,17 +78,48 @@ async def listar_grupos():
     """
     grupos = await Grupo.find_all().to_list()
 
+    ids = {PydanticObjectId(p.id) for grupo in grupos for p in grupo.pessoas}
+    if not ids:
+        return grupos
+
+    # Uma única agregação traz todas as pessoas dos grupos com os títulos
+    # das suas memórias, em vez de duas consultas por pessoa. O $match e as
+    # projeções vêm antes do $lookup para que só nome e títulos circulem.
+    # O _id já volta como string, no mesmo formato de PessoaRef.id
+    pessoas = await Pessoa.aggregate(
+        [
+            {"$match": {"_id": {"$in": list(ids)}}},
+            {"$project": {"nome": 1}},
+            {
+                "$lookup": {
+                    "from": Memoria.get_motor_collection().name,
+                    "localField": "_id",
+                    "foreignField": "pessoa._id",
+                    "pipeline": [{"$project": {"_id": 0, "titulo": 1}}],
+                    "as": "memorias",
+                }
+            },
+            {
+                "$project": {
+                    "_id": {"$toString": "$_id"},
+                    "nome": 1,
+                    "memorias": "$memorias.titulo",
+                }
+            },
+        ]
+    ).to_list()
+    pessoas_por_id = {p["_id"]: p for p in pessoas}
+
     for grupo in grupos:
         novas_pessoas = []
         for pessoa_ref in grupo.pessoas:
-            pessoa = await Pessoa.get(PydanticObjectId(pessoa_ref.id))
+            pessoa = pessoas_por_id.get(pessoa_ref.id)
             if pessoa:
-                memorias_pessoa = await Memoria.find(Memoria.pessoa == pessoa).to_list()
                 novas_pessoas.append(
-                    PessoaRef(
-                        id=str(pessoa.id),
-                        nome=pessoa.nome,
-                        memorias=[m.titulo for m in memorias_pessoa],
+                    PessoaRef.model_construct(
+                        id=pessoa_ref.id,
+                        nome=pessoa["nome"],
+                        memorias=pessoa["memorias"],
                     )
                 )
             else:
@@ -89,16 +141,13 @@ async def deletar_grupo(grupo_identificador: Union[PydanticObjectId, str]):
     Returns:
         dict: Mensagem de sucesso.
     """
-    grupo = (
-        await Grupo.get(grupo_identificador)
-        if isinstance(grupo_identificador, PydanticObjectId)
-        else await Grupo.find_one({"nome": grupo_identificador})
-    )
+    grupo = await _buscar_grupo(grupo_identificador)
 
     if not grupo:
         raise HTTPException(status_code=404, detail="Grupo não encontrado")
 
     await grupo.delete()
+    await invalidar("grupos")
     return {"mensagem": f"Grupo '{grupo.nome}' deletado com sucesso!"}
 
 
@@ -120,36 +169,40 @@ async def adicionar_pessoa(
     Returns:
         dict: Mensagem de sucesso confirmando a adição.
     """
-    grupo = (
-        await Grupo.get(grupo_identificador)
-        if isinstance(grupo_identificador, PydanticObjectId)
-        else await Grupo.find_one({"nome": grupo_identificador})
-    )
-    pessoa = (
-        await Pessoa.get(pessoa_identificador)
-        if isinstance(pessoa_identificador, PydanticObjectId)
-        else await Pessoa.find_one({"nome": pessoa_identificador})
+    grupo, pessoa = await asyncio.gather(
+        _buscar_grupo(grupo_identificador), _buscar_pessoa(pessoa_identificador)
     )
 
     if not grupo or not pessoa:
         raise HTTPException(status_code=404, detail="Grupo ou pessoa não encontrado")
 
-    if not any(p.id == str(pessoa.id) for p in grupo.pessoas):
-        memorias_da_pessoa = await Memoria.find(
-            Memoria.pessoa.id == pessoa.id
-        ).to_list()
-        pessoa_ref = PessoaRef(
-            id=str(pessoa.id),
-            nome=pessoa.nome,
-            memorias=[memoria.titulo for memoria in memorias_da_pessoa],
-        )
-        grupo.pessoas.append(pessoa_ref)
-        await grupo.save()
-
-    return {
+    mensagem = {
         "mensagem": f"Pessoa '{pessoa.nome}' e suas memórias foram adicionadas ao grupo '{grupo.nome}'!"
     }
 
+    # O grupo já foi carregado: se a pessoa já faz parte dele, os títulos
+    # das memórias nem chegam a ser buscados
+    if any(membro.id == str(pessoa.id) for membro in grupo.pessoas):
+        return mensagem
+
+    memorias_da_pessoa = (
+        await Memoria.find({"pessoa._id": pessoa.id}).project(MemoriaTitulo).to_list()
+    )
+    pessoa_ref = PessoaRef.model_construct(
+        id=str(pessoa.id),
+        nome=pessoa.nome,
+        memorias=[memoria.titulo for memoria in memorias_da_pessoa],
+    )
+    # O filtro repete a verificação para o caso de outra requisição ter
+    # adicionado a pessoa depois da leitura do grupo
+    resultado = await Grupo.find_one(
+        {"_id": grupo.id, "pessoas.id": {"$ne": pessoa_ref.id}}
+    ).update(Push({Grupo.pessoas: pessoa_ref}))
+    if resultado and resultado.modified_count:
+        await invalidar("grupos")
+
+    return mensagem
+
 
 @router.delete("/{grupo_identificador}/pessoas/{pessoa_identificador}")
 async def remover_pessoa(
@@ -169,22 +222,18 @@ async def remover_pessoa(
     Returns:
         dict: Mensagem de sucesso confirmando a remoção.
     """
-    grupo = (
-        await Grupo.get(grupo_identificador)
-        if isinstance(grupo_identificador, PydanticObjectId)
-        else await Grupo.find_one({"nome": grupo_identificador})
-    )
-    pessoa = (
-        await Pessoa.get(pessoa_identificador)
-        if isinstance(pessoa_identificador, PydanticObjectId)
-        else await Pessoa.find_one({"nome": pessoa_identificador})
+    grupo, pessoa = await asyncio.gather(
+        _buscar_grupo(grupo_identificador), _buscar_pessoa(pessoa_identificador)
     )
 
     if not grupo or not pessoa:
         raise HTTPException(status_code=404, detail="Grupo ou pessoa não encontrado")
 
-    grupo.pessoas = [p for p in grupo.pessoas if p.id != str(pessoa.id)]
-    await grupo.save()
+    # O servidor remove a referência sem que o grupo seja regravado inteiro
+    await Grupo.find_one(Grupo.id == grupo.id).update(
+        Pull({Grupo.pessoas: {"id": str(pessoa.id)}})
+    )
+    await invalidar("grupos")
 
     return {"mensagem": f"Pessoa '{pessoa.nome}' removida do grupo '{grupo.nome}'"}
 
@@ -200,28 +249,39 @@ async def listar_pessoas_e_memorias(grupo_identificador: Union[PydanticObjectId,
     Returns:
         List[dict]: Lista de pessoas no grupo com suas respectivas memórias.
     """
-    grupo = (
-        await Grupo.get(grupo_identificador)
-        if isinstance(grupo_identificador, PydanticObjectId)
-        else await Grupo.find_one({"nome": grupo_identificador})
-    )
+    grupo = await _buscar_grupo(grupo_identificador)
 
     if not grupo:
         raise HTTPException(status_code=404, detail="Grupo não encontrado")
 
+    ids = [PydanticObjectId(p.id) for p in grupo.pessoas]
+    if not ids:
+        return []
+
+    # Duas consultas em lote no lugar de duas consultas por pessoa
+    pessoas = await Pessoa.find({"_id": {"$in": ids}}).to_list()
+    memorias = (
+        await Memoria.find({"pessoa._id": {"$in": ids}})
+        .project(MemoriaDescricao)
+        .to_list()
+    )
+
+    pessoas_por_id = {p.id: p for p in pessoas}
+    memorias_por_pessoa = defaultdict(list)
+    for memoria in memorias:
+        memorias_por_pessoa[memoria.pessoa.id].append(
+            {"titulo": memoria.titulo, "descricao": memoria.descricao}
+        )
+
     resultado = []
-    for pessoa_ref in grupo.pessoas:
-        pessoa = await Pessoa.get(PydanticObjectId(pessoa_ref.id))
+    for pessoa_id in ids:
+        pessoa = pessoas_por_id.get(pessoa_id)
         if pessoa:
-            memorias = await Memoria.find(Memoria.pessoa == pessoa).to_list()
             resultado.append(
                 {
                     "id": str(pessoa.id),
                     "nome": pessoa.nome,
-                    "memorias": [
-                        {"titulo": memoria.titulo, "descricao": memoria.descricao}
-                        for memoria in memorias
-                    ],
+                    "memorias": memorias_por_pessoa[pessoa.id],
                 }
             )
 
@@ -241,24 +301,16 @@ async def listar_grupos_de_pessoa(pessoa_identificador: Union[PydanticObjectId,
     Returns:
         List[dict]: Lista de grupos onde a pessoa está, incluindo suas memórias associadas.
     """
-    pessoa = (
-        await Pessoa.get(pessoa_identificador)
-        if isinstance(pessoa_identificador, PydanticObjectId)
-        else await Pessoa.find_one({"nome": pessoa_identificador})
-    )
+    pessoa = await _buscar_pessoa(pessoa_identificador)
 
     if not pessoa:
         raise HTTPException(status_code=404, detail="Pessoa não encontrada")
 
-    grupos = await Grupo.find({"pessoas.id": str(pessoa.id)}).to_list()
+    grupos = (
+        await Grupo.find({"pessoas.id": str(pessoa.id)}).project(GrupoResumo).to_list()
+    )
 
     if not grupos:
         raise HTTPException(status_code=404, detail="A pessoa não está em nenhum grupo")
 
-    resultado = []
-    for grupo in grupos:
-        resultado.append({"id": str(grupo.id), "nome": grupo.nome})
-
-    return resultado
-
-    return resultado
+    return [{"id": str(grupo.id), "nome": grupo.nome} for grupo in grupos]
@@ -1,13 +1,57 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Union
-from app.models.memoria import Memoria
-from app.models.categoria import Categoria
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
+from pymongo import ASCENDING
+from typing import List, Optional, Type, Union
+from app.models.memoria import Memoria, MemoriaResumo
+from app.models.categoria import NOME_COLLATION, Categoria
 from app.models.pessoa import Pessoa
-from beanie import PydanticObjectId
+from app.cache import em_cache, invalidar
+from app.streaming import resposta_em_fluxo
+from beanie import Document, PydanticObjectId, UpdateResponse
+from beanie.operators import Set
 
 router = APIRouter()
 
 
+def _estagios_memorias_da_pessoa() -> List[dict]:
+    """
+    Estágios de agregação que trazem os títulos das memórias da pessoa de cada
+    memória em `_memorias_pessoa`, no lugar de uma consulta por linha.
+    """
+    return [
+        # Memórias sem pessoa não devem casar com as demais memórias sem pessoa
+        {"$set": {"_pessoa_id": {"$ifNull": ["$pessoa._id", False]}}},
+        {
+            "$lookup": {
+                "from": Memoria.get_motor_collection().name,
+                "localField": "_pessoa_id",
+                "foreignField": "pessoa._id",
+                "pipeline": [{"$project": {"_id": 0, "titulo": 1}}],
+                "as": "_memorias_pessoa",
+            }
+        },
+        {"$project": {"_pessoa_id": 0}},
+    ]
+
+
+def _memoria_com_memorias_da_pessoa(documento: dict) -> Memoria:
+    """Monta a memória agregada, preenchendo os títulos da pessoa associada."""
+    titulos = [m["titulo"] for m in documento.pop("_memorias_pessoa")]
+    memoria = Memoria.model_validate(documento)
+    if memoria.pessoa:
+        memoria.pessoa.memorias = titulos
+    return memoria
+
+
+async def _referencia_existe(
+    modelo: Type[Document], documento: Optional[Document]
+) -> bool:
+    """Verifica se o documento embutido, quando informado, existe na coleção."""
+    if documento is None:
+        return True
+    return await modelo.find(modelo.id == documento.id).limit(1).exists()
+
+
 @router.post("/", response_model=Memoria)
 async def criar_memoria(memoria: Memoria):
     """
@@ -20,42 +64,71 @@ async def criar_memoria(memoria: Memoria):
     Raises:
         HTTPException 400: Se pessoa ou categoria não existirem
     """
-    if memoria.pessoa and not await Pessoa.get(memoria.pessoa.id):
+    pessoa_existe, categoria_existe = await asyncio.gather(
+        _referencia_existe(Pessoa, memoria.pessoa),
+        _referencia_existe(Categoria, memoria.categoria),
+    )
+
+    if not pessoa_existe:
         raise HTTPException(status_code=400, detail="Pessoa não encontrada")
 
-    if memoria.categoria and not await Categoria.get(memoria.categoria.id):
+    if not categoria_existe:
         raise HTTPException(status_code=400, detail="Categoria não encontrada")
 
     await memoria.insert()
+    await invalidar("memorias")
     return memoria
 
 
 @router.get("/", response_model=List[Memoria])
 async def listar_memorias(
-    limit: int = Query(10, description="Número máximo de memórias a retornar"),
-    skip: int = Query(0, description="Número de registros a pular"),
+    request: Request,
+    limit: int = Query(10, ge=1, description="Número máximo de memórias a retornar"),
+    skip: int = Query(0, ge=0, description="Número de registros a pular"),
+    after: Optional[PydanticObjectId] = Query(
+        None, description="ID da última memória da página anterior"
+    ),
 ):
     """
-    Lista memórias com paginação.
+    Lista memórias com paginação, ordenadas pelo ID.
 
     Features:
-    - Paginação via limit/skip
+    - Paginação por cursor: envie em `after` o ID da última memória recebida
+    - Paginação via limit/skip, mantida por compatibilidade
     - Carrega títulos das memórias relacionadas à pessoa
+
+    A resposta é enviada em partes conforme o cursor avança, sem montar a
+    página inteira em memória antes de serializá-la (NDJSON com
+    `Accept: application/x-ndjson`).
     """
-    query = Memoria.find()
-    memorias = await query.skip(skip).limit(limit).to_list()
+    filtro = {"_id": {"$gt": after}} if after else {}
+    documentos = aiter(
+        Memoria.aggregate(
+            [
+                {"$match": filtro},
+                {"$sort": {"_id": ASCENDING}},
+                {"$skip": skip},
+                {"$limit": limit},
+                *_estagios_memorias_da_pessoa(),
+            ]
+        )
+    )
+    # A primeira leitura acontece antes do status 200, para que uma falha da
+    # agregação ainda responda com erro em vez de um array truncado
+    primeiro = await anext(documentos, None)
 
-    for memoria in memorias:
-        if memoria.pessoa:
-            memorias_pessoa = await Memoria.find(
-                Memoria.pessoa == memoria.pessoa
-            ).to_list()
-            memoria.pessoa.memorias = [m.titulo for m in memorias_pessoa]
+    async def gerar_memorias():
+        if primeiro is None:
+            return
+        yield _memoria_com_memorias_da_pessoa(primeiro)
+        async for documento in documentos:
+            yield _memoria_com_memorias_da_pessoa(documento)
 
-    return memorias
+    return resposta_em_fluxo(request, gerar_memorias())
 
 
 @router.get("/{id}", response_model=Memoria)
+@em_cache("memorias")
 async def obter_memoria(id: str):
     """
     Obtém detalhes de uma memória específica pelo ID.
@@ -66,15 +139,13 @@ async def obter_memoria(id: str):
     Raises:
         HTTPException 404: Se memória não for encontrada
     """
-    memoria = await Memoria.get(PydanticObjectId(id))
-    if not memoria:
+    documentos = await Memoria.aggregate(
+        [{"$match": {"_id": PydanticObjectId(id)}}, *_estagios_memorias_da_pessoa()]
+    ).to_list()
+    if not documentos:
         raise HTTPException(status_code=404, detail="Memória não encontrada")
 
-    if memoria.pessoa:
-        memorias_pessoa = await Memoria.find(Memoria.pessoa == memoria.pessoa).to_list()
-        memoria.pessoa.memorias = [m.titulo for m in memorias_pessoa]
-
-    return memoria
+    return _memoria_com_memorias_da_pessoa(documentos[0])
 
 
 @router.put("/{id}", response_model=Memoria)
@@ -85,20 +156,29 @@ async def atualizar_memoria(id: str, memoria: Memoria):
     Comportamento:
     - Substitui todos os campos pelos novos valores
     - Mantém o mesmo ID original
+
+    A busca e a alteração são feitas em uma única operação atômica.
     """
-    existing_memoria = await Memoria.get(PydanticObjectId(id))
-    if not existing_memoria:
+    memoria_atualizada = await Memoria.find_one(
+        Memoria.id == PydanticObjectId(id)
+    ).update(
+        Set(
+            {
+                Memoria.titulo: memoria.titulo,
+                Memoria.descricao: memoria.descricao,
+                Memoria.data: memoria.data,
+                Memoria.emocao: memoria.emocao,
+                Memoria.categoria: memoria.categoria,
+                Memoria.pessoa: memoria.pessoa,
+            }
+        ),
+        response_type=UpdateResponse.NEW_DOCUMENT,
+    )
+    if not memoria_atualizada:
         raise HTTPException(status_code=404, detail="Memória não encontrada")
 
-    existing_memoria.titulo = memoria.titulo
-    existing_memoria.descricao = memoria.descricao
-    existing_memoria.data = memoria.data
-    existing_memoria.emocao = memoria.emocao
-    existing_memoria.categoria = memoria.categoria
-    existing_memoria.pessoa = memoria.pessoa
-
-    await existing_memoria.save()
-    return existing_memoria
+    await invalidar("memorias")
+    return memoria_atualizada
 
 
 @router.delete("/{id}")
@@ -114,10 +194,12 @@ async def excluir_memoria(id: str):
         raise HTTPException(status_code=404, detail="Memória não encontrada")
 
     await memoria.delete()
+    await invalidar("memorias")
     return {"message": "Memória excluída com sucesso"}
 
 
-@router.get("/categoria/{identificador}", response_model=List[Memoria])
+@router.get("/categoria/{identificador}", response_model=List[MemoriaResumo])
+@em_cache("categorias", "memorias")
 async def listar_memorias_por_categoria(identificador: Union[int, str]):
     """
     Busca memórias por categoria usando ID ou nome.
@@ -128,21 +210,34 @@ async def listar_memorias_por_categoria(identificador: Union[int, str]):
     Features:
     - Busca case insensitive para nomes
     - Valida existência da categoria
+    - Retorna apenas o resumo de cada memória (projeção no servidor)
+
+    Com um ID numérico as memórias são filtradas direto pelo categoria_id
+    embutido; a categoria só é consultada quando nenhuma memória é encontrada.
     """
+    categoria_verificada = False
     if isinstance(identificador, int) or identificador.isdigit():
-        categoria = await Categoria.find_one(
-            Categoria.categoria_id == int(identificador)
-        )
+        categoria_id = int(identificador)
     else:
-        categoria = await Categoria.find_one(
-            {"nome": {"$regex": f"^{identificador}$", "$options": "i"}}
-        )
-
-    if not categoria:
-        raise HTTPException(status_code=404, detail="Categoria não encontrada")
-
-    memorias = await Memoria.find(Memoria.categoria == categoria).to_list()
+        categoria = await Categoria.buscar_por_identificador(identificador)
+        if not categoria:
+            raise HTTPException(status_code=404, detail="Categoria não encontrada")
+        categoria_id = categoria.categoria_id
+        categoria_verificada = True
+
+    memorias = (
+        await Memoria.find({"categoria.categoria_id": categoria_id})
+        .project(MemoriaResumo)
+        .to_list()
+    )
     if not memorias:
+        if (
+            not categoria_verificada
+            and not await Categoria.find(Categoria.categoria_id == categoria_id)
+            .limit(1)
+            .exists()
+        ):
+            raise HTTPException(status_code=404, detail="Categoria não encontrada")
         raise HTTPException(
             status_code=404, detail="Nenhuma memória encontrada para esta categoria"
         )
@@ -150,26 +245,40 @@ async def listar_memorias_por_categoria(identificador: Union[int, str]):
     return memorias
 
 
-@router.get("/pessoa/{identificador}", response_model=List[Memoria])
+@router.get("/pessoa/{identificador}", response_model=List[MemoriaResumo])
 async def listar_memorias_por_pessoa(identificador: Union[str, PydanticObjectId]):
     """
     Busca memórias associadas a uma pessoa usando ID ou nome.
 
     Params:
         identificador (str|ObjectId): ID da pessoa ou nome exato
+
+    Retorna apenas o resumo de cada memória (projeção no servidor).
+
+    Com um ID as memórias são filtradas direto pelo _id da pessoa embutida;
+    a pessoa só é consultada quando nenhuma memória é encontrada.
     """
-    if isinstance(identificador, PydanticObjectId) or len(identificador) == 24:
-        pessoa = await Pessoa.get(PydanticObjectId(identificador))
+    pessoa_verificada = False
+    if PydanticObjectId.is_valid(identificador):
+        pessoa_id = PydanticObjectId(identificador)
     else:
         pessoa = await Pessoa.find_one(
-            {"nome": {"$regex": f"^{identificador}$", "$options": "i"}}
+            Pessoa.nome == identificador, collation=NOME_COLLATION
         )
-
-    if not pessoa:
-        raise HTTPException(status_code=404, detail="Pessoa não encontrada")
-
-    memorias = await Memoria.find(Memoria.pessoa == pessoa).to_list()
+        if not pessoa:
+            raise HTTPException(status_code=404, detail="Pessoa não encontrada")
+        pessoa_id = pessoa.id
+        pessoa_verificada = True
+
+    memorias = (
+        await Memoria.find({"pessoa._id": pessoa_id}).project(MemoriaResumo).to_list()
+    )
     if not memorias:
+        if (
+            not pessoa_verificada
+            and not await Pessoa.find(Pessoa.id == pessoa_id).limit(1).exists()
+        ):
+            raise HTTPException(status_code=404, detail="Pessoa não encontrada")
         raise HTTPException(
             status_code=404, detail="Nenhuma memória encontrada para esta pessoa"
         )
@@ -178,40 +287,94 @@ async def listar_memorias_por_pessoa(identificador: Union[str, PydanticObjectId]
 
 
 @router.get("/memorias/buscar", response_model=List[Memoria])
-async def buscar_memorias(termo: str):
+async def buscar_memorias(
+    request: Request,
+    termo: str,
+    limit: int = Query(50, description="Número máximo de memórias a retornar"),
+):
     """
     Busca textual em memórias usando índice full-text.
 
     Params:
         termo (str): Palavra ou frase para busca
+        limit (int): Número máximo de resultados, dos mais relevantes
+
+    Os resultados são enviados conforme o cursor avança (NDJSON com
+    `Accept: application/x-ndjson`).
     """
     if not termo:
         raise HTTPException(
             status_code=400, detail="O termo de busca não pode ser vazio."
         )
 
-    memorias = await Memoria.find({"$text": {"$search": termo}}).to_list()
-    if not memorias:
+    memorias = aiter(
+        Memoria.find({"$text": {"$search": termo}})
+        .sort([("score", {"$meta": "textScore"})])
+        .limit(limit)
+    )
+    # O primeiro resultado é lido antes de iniciar a resposta, para que a
+    # busca sem resultados ainda responda 404
+    primeira = await anext(memorias, None)
+    if primeira is None:
         raise HTTPException(
             status_code=404, detail="Nenhuma memória encontrada com o termo fornecido."
         )
 
-    return memorias
+    async def gerar_memorias():
+        yield primeira
+        async for memoria in memorias:
+            yield memoria
+
+    return resposta_em_fluxo(request, gerar_memorias())
 
 
 @router.get("/estatisticas/quantidade")
+@em_cache("categorias", "memorias")
 async def contar_memorias():
     """
     Retorna estatísticas agregadas das memórias.
 
     Retorna:
-        total_memorias (int): Contagem total
-        quantidade_por_categoria (list): Agrupamento por categoria
+        total_memorias (int): Contagem total, estimada pelos metadados da coleção
+        quantidade_por_categoria (list): Agrupamento por categoria, com o
+            categoria_id e o nome atual de cada categoria
     """
-    total_memorias = await Memoria.find().count()
-    contagem_por_categoria = await Memoria.aggregate(
-        [{"$group": {"_id": "$categoria.nome", "quantidade": {"$sum": 1}}}]
-    ).to_list()
+    # O total vem dos metadados da coleção, sem percorrer os documentos.
+    # Agrupa pelo categoria_id embutido e busca o nome atual na coleção de
+    # categorias, já que o nome copiado na memória não acompanha renomeações.
+    # Como nas demais agregações, filtros e projeções vêm antes de $group e
+    # $sort, para que esses estágios recebam só os campos que usam
+    total_memorias, contagem_por_categoria = await asyncio.gather(
+        Memoria.get_motor_collection().estimated_document_count(),
+        Memoria.aggregate(
+            [
+                {"$project": {"_id": 0, "categoria_id": "$categoria.categoria_id"}},
+                {
+                    "$group": {
+                        "_id": "$categoria_id",
+                        "quantidade": {"$sum": 1},
+                    }
+                },
+                {
+                    "$lookup": {
+                        "from": Categoria.get_motor_collection().name,
+                        "localField": "_id",
+                        "foreignField": "categoria_id",
+                        "as": "categoria",
+                    }
+                },
+                {
+                    "$project": {
+                        "_id": 0,
+                        "categoria_id": "$_id",
+                        "nome": {"$arrayElemAt": ["$categoria.nome", 0]},
+                        "quantidade": 1,
+                    }
+                },
+                {"$sort": {"quantidade": -1}},
+            ]
+        ).to_list(),
+    )
 
     return {
         "total_memorias": total_memorias,
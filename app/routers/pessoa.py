@@ -1,13 +1,52 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import List, Literal, Optional
 from datetime import date, datetime
 from app.models.pessoa import Pessoa
-from app.models.memoria import Memoria
-from beanie import PydanticObjectId
+from app.models.memoria import Memoria, MemoriaTitulo
+from app.cache import em_cache, invalidar
+from app.streaming import resposta_em_fluxo
+from beanie import PydanticObjectId, UpdateResponse
+from beanie.operators import Set
 from pymongo import DESCENDING, ASCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 router = APIRouter()
 
+# Direção do índice para cada valor aceito no parâmetro `ordem`
+ORDENS = {"asc": ASCENDING, "desc": DESCENDING}
+
+
+def _filtro_pessoa(identificador: str) -> dict:
+    """Filtra pelo ID, quando o identificador for um ObjectId, ou pelo nome."""
+    if PydanticObjectId.is_valid(identificador):
+        return {"_id": PydanticObjectId(identificador)}
+    return {"nome": identificador}
+
+
+async def _buscar_pessoa(identificador: str) -> Optional[Pessoa]:
+    """Busca uma pessoa pelo ID ou pelo nome exato."""
+    return await Pessoa.find_one(_filtro_pessoa(identificador))
+
+
+def _estagios_memorias() -> List[dict]:
+    """
+    Estágios de agregação que preenchem `memorias` com os títulos das memórias
+    de cada pessoa, na mesma consulta que busca as pessoas.
+    """
+    return [
+        {
+            "$lookup": {
+                "from": Memoria.get_motor_collection().name,
+                "localField": "_id",
+                "foreignField": "pessoa._id",
+                "pipeline": [{"$project": {"_id": 0, "titulo": 1}}],
+                "as": "memorias",
+            }
+        },
+        {"$set": {"memorias": "$memorias.titulo"}},
+    ]
+
 
 @router.post("/", response_model=Pessoa)
 async def criar_pessoa(pessoa: Pessoa):
@@ -16,50 +55,88 @@ async def criar_pessoa(pessoa: Pessoa):
 
     Validações:
     - Nome deve ser único no sistema
-    - Data de nascimento obrigatória e válida
+    - Data de nascimento obrigatória e válida (AAAA-MM-DD, validada pelo modelo)
+
+    A unicidade do nome é garantida pelo índice único da coleção.
     """
-    if await Pessoa.find_one(Pessoa.nome == pessoa.nome):
+    try:
+        await pessoa.insert()
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=400, detail="Já existe uma pessoa com este nome"
         )
 
-    # Valida formato da data de nascimento
-    if isinstance(pessoa.data_nascimento, str):
-        try:
-            pessoa.data_nascimento = datetime.strptime(
-                pessoa.data_nascimento, "%Y-%m-%d"
-            ).date()
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Formato inválido para data de nascimento. Use YYYY-MM-DD.",
-            )
-
-    await pessoa.insert()
+    await invalidar("pessoas")
     return pessoa
 
 
+@router.post("/bulk")
+async def criar_pessoas_em_lote(pessoas: List[Pessoa]):
+    """
+    Cria várias pessoas com um único insert_many.
+
+    Features:
+    - Não interrompe o lote no primeiro erro (ordered=False)
+    - Nomes repetidos são rejeitados pelo índice único, sem consultas prévias
+    - Retorna a quantidade inserida e os nomes duplicados
+    """
+    if not pessoas:
+        return {"inseridas": 0, "duplicadas": []}
+
+    try:
+        resultado = await Pessoa.insert_many(pessoas, ordered=False)
+        inseridas, duplicadas = len(resultado.inserted_ids), []
+    except BulkWriteError as e:
+        erros = e.details["writeErrors"]
+        # Só duplicidade de nome é esperada; demais erros seguem adiante
+        if any(erro["code"] != 11000 for erro in erros):
+            raise
+        inseridas = e.details["nInserted"]
+        duplicadas = [pessoas[erro["index"]].nome for erro in erros]
+
+    if inseridas:
+        await invalidar("pessoas")
+    return {"inseridas": inseridas, "duplicadas": duplicadas}
+
+
 @router.get("/", response_model=List[Pessoa])
+@em_cache("pessoas", "memorias")
 async def listar_pessoas(
-    limit: int = Query(10, description="Número máximo de pessoas a retornar"),
-    skip: int = Query(0, description="Número de registros a pular"),
+    limit: int = Query(10, ge=1, description="Número máximo de pessoas a retornar"),
+    skip: int = Query(0, ge=0, description="Número de registros a pular"),
+    after: Optional[PydanticObjectId] = Query(
+        None, description="ID da última pessoa da página anterior"
+    ),
 ):
     """
-    Lista pessoas com paginação básica.
+    Lista pessoas com paginação, ordenadas pelo ID.
+
+    Paginação:
+    - Por cursor: envie em `after` o ID da última pessoa recebida
+    - Por deslocamento: limit/skip, mantido por compatibilidade
 
     Adicional:
     - Inclui títulos das memórias relacionadas
     """
-    pessoas = await Pessoa.find().skip(skip).limit(limit).to_list()
-
-    for pessoa in pessoas:
-        memorias_pessoa = await Memoria.find(Memoria.pessoa == pessoa).to_list()
-        pessoa.memorias = [m.titulo for m in memorias_pessoa]
+    filtro = {"_id": {"$gt": after}} if after else {}
+    documentos = (
+        await Pessoa.find(filtro)
+        .aggregate(
+            [
+                {"$sort": {"_id": ASCENDING}},
+                {"$skip": skip},
+                {"$limit": limit},
+                *_estagios_memorias(),
+            ]
+        )
+        .to_list()
+    )
 
-    return pessoas
+    return [Pessoa.model_validate(documento) for documento in documentos]
 
 
 @router.get("/{identificador}", response_model=Pessoa)
+@em_cache("pessoas", "memorias")
 async def obter_pessoa(identificador: str):
     """
     Obtém pessoa por ID ou nome exato.
@@ -68,16 +145,14 @@ async def obter_pessoa(identificador: str):
     - Busca flexível por diferentes identificadores
     - Carrega memórias associadas automaticamente
     """
-    pessoa = None
-    try:
-        pessoa = await Pessoa.get(PydanticObjectId(identificador))
-    except ValueError:  # Ou outra exceção mais apropriada
-        pessoa = await Pessoa.find_one(Pessoa.nome == identificador)
+    pessoa = await _buscar_pessoa(identificador)
 
     if not pessoa:
         raise HTTPException(status_code=404, detail="Pessoa não encontrada")
 
-    memorias_pessoa = await Memoria.find(Memoria.pessoa == pessoa).to_list()
+    memorias_pessoa = (
+        await Memoria.find({"pessoa._id": pessoa.id}).project(MemoriaTitulo).to_list()
+    )
     pessoa.memorias = [m.titulo for m in memorias_pessoa]
 
     return pessoa
@@ -91,21 +166,29 @@ async def atualizar_pessoa(identificador: str, pessoa: Pessoa):
     Permite:
     - Alteração de nome (mantendo unicidade)
     - Atualização de data de nascimento
-    """
-    existing_pessoa = None
 
+    A busca e a alteração são feitas em uma única operação atômica.
+    """
     try:
-        pessoa = await Pessoa.get(PydanticObjectId(identificador))
-    except ValueError:  # Ou outra exceção mais apropriada
-        pessoa = await Pessoa.find_one(Pessoa.nome == identificador)
+        pessoa_atualizada = await Pessoa.find_one(_filtro_pessoa(identificador)).update(
+            Set(
+                {
+                    Pessoa.nome: pessoa.nome,
+                    Pessoa.data_nascimento: pessoa.data_nascimento,
+                }
+            ),
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400, detail="Já existe uma pessoa com este nome"
+        )
 
-    if not existing_pessoa:
+    if not pessoa_atualizada:
         raise HTTPException(status_code=404, detail="Pessoa não encontrada")
 
-    existing_pessoa.nome = pessoa.nome
-    existing_pessoa.data_nascimento = pessoa.data_nascimento
-    await existing_pessoa.save()
-    return existing_pessoa
+    await invalidar("pessoas")
+    return pessoa_atualizada
 
 
 @router.delete("/{identificador}")
@@ -117,25 +200,24 @@ async def excluir_pessoa(identificador: str):
     - Exclui todas as memórias vinculadas automaticamente
     - Permite exclusão por ID ou nome
     """
-    pessoa = None
-
-    try:
-        pessoa = await Pessoa.get(PydanticObjectId(identificador))
-    except ValueError:  # Ou outra exceção mais apropriada
-        pessoa = await Pessoa.find_one(Pessoa.nome == identificador)
+    pessoa = await _buscar_pessoa(identificador)
 
     if not pessoa:
         raise HTTPException(status_code=404, detail="Pessoa não encontrada")
 
-    # Exclui todas as memórias associadas
-    await Memoria.find(Memoria.pessoa == pessoa).delete()
-
-    await pessoa.delete()
+    # A pessoa e suas memórias são excluídas ao mesmo tempo, cada uma com um
+    # único delete no servidor
+    await asyncio.gather(
+        Memoria.find({"pessoa._id": pessoa.id}).delete(),
+        pessoa.delete(),
+    )
+    await invalidar("pessoas", "memorias")
     return {"message": "Pessoa e suas memórias associadas foram excluídas com sucesso"}
 
 
 @router.get("/filtrar/data_nascimento", response_model=List[Pessoa])
 async def filtrar_pessoas_por_data_nascimento(
+    request: Request,
     ano: Optional[int] = Query(None, description="Ano de nascimento da pessoa"),
     data_inicio: Optional[str] = Query(None, description="Data inicial (YYYY-MM-DD)"),
     data_fim: Optional[str] = Query(None, description="Data final (YYYY-MM-DD)"),
@@ -149,37 +231,60 @@ async def filtrar_pessoas_por_data_nascimento(
 
     Valida:
     - Formato correto das datas (YYYY-MM-DD)
+
+    Os filtros informados são combinados (ano e intervalo), e cada um vira
+    uma faixa sobre o índice de data_nascimento.
+
+    Como o resultado não tem limite, as pessoas são enviadas conforme o
+    cursor avança (NDJSON com `Accept: application/x-ndjson`).
     """
-    filtro = {}
+    condicoes = []
 
     if ano:
-        filtro["data_nascimento"] = {"$gte": date(ano, 1, 1), "$lte": date(ano, 12, 31)}
+        condicoes.append(
+            {"data_nascimento": {"$gte": date(ano, 1, 1), "$lte": date(ano, 12, 31)}}
+        )
 
     if data_inicio and data_fim:
         try:
             data_inicio = datetime.strptime(data_inicio, "%Y-%m-%d").date()
             data_fim = datetime.strptime(data_fim, "%Y-%m-%d").date()
-            filtro["data_nascimento"] = {"$gte": data_inicio, "$lte": data_fim}
         except ValueError:
             raise HTTPException(
                 status_code=400, detail="Formato de data inválido. Use YYYY-MM-DD."
             )
+        condicoes.append({"data_nascimento": {"$gte": data_inicio, "$lte": data_fim}})
 
-    pessoas = await Pessoa.find(filtro).to_list()
-    if not pessoas:
+    # O Beanie une as condições com $and e converte date para o Date do BSON
+    pessoas = aiter(Pessoa.find(*condicoes))
+    # Lida antes de iniciar a resposta, para que a busca vazia ainda responda 404
+    primeira = await anext(pessoas, None)
+    if primeira is None:
         raise HTTPException(
             status_code=404, detail="Nenhuma pessoa encontrada com esse critério"
         )
 
-    return pessoas
+    async def gerar_pessoas():
+        yield primeira
+        async for pessoa in pessoas:
+            yield pessoa
+
+    return resposta_em_fluxo(request, gerar_pessoas())
 
 
 @router.get("/ordenar/data_nascimento", response_model=List[Pessoa])
+@em_cache("pessoas", "memorias")
 async def ordenar_pessoas_por_data_nascimento(
-    ordem: str = Query(
+    ordem: Literal["asc", "desc"] = Query(
         "desc",
         description="Ordenação por data de nascimento: 'asc' para mais velhos, 'desc' para mais novos",
     ),
+    limit: int = Query(
+        50, ge=1, le=200, description="Número máximo de pessoas a retornar"
+    ),
+    after: Optional[PydanticObjectId] = Query(
+        None, description="ID da última pessoa da página anterior"
+    ),
 ):
     """
     Ordena pessoas por data de nascimento.
@@ -187,15 +292,41 @@ async def ordenar_pessoas_por_data_nascimento(
     Opções:
     - asc: Mais antigas primeiro
     - desc: Mais novas primeiro (padrão)
+
+    Pessoas com a mesma data são desempatadas pelo ID, na mesma direção da
+    data, o que permite continuar a listagem a partir da pessoa informada em
+    `after`. A ordenação e o limite são atendidos pelo índice
+    (data_nascimento, _id), sem ordenação em memória.
     """
-    ordem_mongo = DESCENDING if ordem == "desc" else ASCENDING
+    ordem_mongo = ORDENS[ordem]
 
-    pessoas = await Pessoa.find().sort([("data_nascimento", ordem_mongo)]).to_list()
-    if not pessoas:
+    filtro = {}
+    if after:
+        ultima = await Pessoa.get(after)
+        if not ultima:
+            raise HTTPException(
+                status_code=400, detail="Pessoa informada em after não encontrada"
+            )
+        operador = "$lt" if ordem_mongo == DESCENDING else "$gt"
+        filtro = {
+            "$or": [
+                {"data_nascimento": {operador: ultima.data_nascimento}},
+                {"data_nascimento": ultima.data_nascimento, "_id": {operador: after}},
+            ]
+        }
+
+    documentos = (
+        await Pessoa.find(filtro)
+        .aggregate(
+            [
+                {"$sort": {"data_nascimento": ordem_mongo, "_id": ordem_mongo}},
+                {"$limit": limit},
+                *_estagios_memorias(),
+            ]
+        )
+        .to_list()
+    )
+    if not documentos:
         raise HTTPException(status_code=404, detail="Nenhuma pessoa encontrada")
 
-    for pessoa in pessoas:
-        memorias_pessoa = await Memoria.find(Memoria.pessoa == pessoa).to_list()
-        pessoa.memorias = [m.titulo for m in memorias_pessoa]
-
-    return pessoas
+    return [Pessoa.model_validate(documento) for documento in documentos]
@@ -0,0 +1,36 @@
+from typing import AsyncIterable, AsyncIterator
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON = "application/x-ndjson"
+
+
+async def _lista_json(documentos: AsyncIterable[BaseModel]) -> AsyncIterator[bytes]:
+    """Serializa os documentos como um array JSON, um documento por vez."""
+    separador = b"["
+    async for documento in documentos:
+        yield separador + documento.model_dump_json(by_alias=True).encode()
+        separador = b","
+    yield b"]" if separador == b"," else b"[]"
+
+
+async def _linhas_json(documentos: AsyncIterable[BaseModel]) -> AsyncIterator[bytes]:
+    """Serializa os documentos como NDJSON, um documento por linha."""
+    async for documento in documentos:
+        yield documento.model_dump_json(by_alias=True).encode() + b"\n"
+
+
+def resposta_em_fluxo(
+    request: Request, documentos: AsyncIterable[BaseModel]
+) -> StreamingResponse:
+    """
+    Envia os documentos conforme são lidos do cursor, sem montar a lista inteira.
+
+    O corpo é um array JSON, como nas demais rotas; clientes que enviam
+    `Accept: application/x-ndjson` recebem um documento por linha.
+    """
+    if NDJSON in request.headers.get("accept", ""):
+        return StreamingResponse(_linhas_json(documentos), media_type=NDJSON)
+    return StreamingResponse(_lista_json(documentos), media_type="application/json")